@@ -1,83 +1,254 @@
 import streamlit as st
+import atexit
 import hashlib
 import json
 import os
-from datetime import datetime
 from pathlib import Path
+import tempfile
 import time
-import pandas as pd
 import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# orjson jauh lebih cepat untuk (de)serialisasi hash_db; fallback ke json bawaan
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# BLAKE3 (kriptografis, jauh lebih cepat dari SHA256) sebagai prefilter perubahan isi file
+try:
+    import blake3
+except ImportError:
+    blake3 = None
 
 # Konfigurasi
 SECURE_FOLDER = "./secure_files"
 HASH_DB_FILE = "hash_db.json"
 LOG_FILE = "security.log"
+HASH_CHUNK_SIZE = 1 << 20  # 1 MiB per read saat hashing
+RECENT_LOG_COUNT = 10  # jumlah log terbaru yang ditampilkan
+LOG_LEVELS = {'INFO': 'info', 'WARNING': 'warning', 'ALERT': 'alert'}  # level log -> key di stats
+LEVEL_HANDLERS = {'INFO': st.info, 'WARNING': st.warning, 'ALERT': st.error}  # level log -> widget tampilan
+
+# Backend SHA256: OpenSSL (memakai SHA-NI jika CPU mendukung) atau implementasi bawaan Python
+SHA256_BACKEND = "OpenSSL" if hashlib.sha256.__module__ == "_hashlib" else "builtin"
 
 # Pastikan folder dan file ada
 os.makedirs(SECURE_FOLDER, exist_ok=True)
 Path(LOG_FILE).touch(exist_ok=True)
 
+# Buffer baca per thread worker, dialokasikan sekali lalu dipakai ulang untuk semua file
+hash_buffers = threading.local()
+
+def update_from_file(f, *hashers):
+    """Membaca file ke satu atau lebih hasher lewat satu buffer yang dipakai ulang (tanpa alokasi per chunk)"""
+    view = getattr(hash_buffers, 'view', None)
+    if view is None:
+        view = hash_buffers.view = memoryview(bytearray(HASH_CHUNK_SIZE))
+    while n := f.readinto(view):
+        chunk = view[:n]
+        for hasher in hashers:
+            hasher.update(chunk)
+
 def calculate_hash(filepath):
     """Menghitung hash SHA256 dari file"""
     try:
-        sha256 = hashlib.sha256()
-        with open(filepath, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                sha256.update(chunk)
-        return sha256.hexdigest()
+        with open(filepath, 'rb', buffering=0) as f:
+            # Python 3.11+: loop baca + update berjalan penuh di C
+            if hasattr(hashlib, 'file_digest'):
+                return hashlib.file_digest(f, "sha256").hexdigest()
+            sha256 = hashlib.sha256()
+            update_from_file(f, sha256)
+            return sha256.hexdigest()
     except Exception as e:
         return None
 
-def log_activity(level, message, filename=""):
-    """Mencatat aktivitas ke file log"""
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+def calculate_fingerprint(filepath):
+    """Menghitung fingerprint BLAKE3 dari file (None jika blake3 tidak terpasang)"""
+    if blake3 is None:
+        return None
+    try:
+        fingerprint = blake3.blake3()
+        with open(filepath, 'rb', buffering=0) as f:
+            update_from_file(f, fingerprint)
+        return fingerprint.hexdigest()
+    except Exception as e:
+        return None
+
+def calculate_hashes(filepath):
+    """Menghitung (sha256, blake3) dalam satu kali baca, agar keduanya dari isi file yang sama"""
+    if blake3 is None:
+        return calculate_hash(filepath), None
+    try:
+        sha256 = hashlib.sha256()
+        fingerprint = blake3.blake3()
+        with open(filepath, 'rb', buffering=0) as f:
+            update_from_file(f, sha256, fingerprint)
+        return sha256.hexdigest(), fingerprint.hexdigest()
+    except Exception as e:
+        return None, None
+
+def hash_file(filepath, known=None):
+    """Menghitung (sha256, blake3); SHA256 dilewati jika fingerprint BLAKE3 sama dengan baseline"""
+    # Cek BLAKE3 dulu hanya jika baseline punya fingerprint untuk dibandingkan
+    if known and known.get('blake3'):
+        fingerprint = calculate_fingerprint(filepath)
+        if fingerprint == known['blake3']:
+            return known['hash'], fingerprint
+    return calculate_hashes(filepath)
+
+def format_timestamp(timestamp=None):
+    """Format waktu "YYYY-MM-DD HH:MM:SS" tanpa strftime (lebih cepat di hot path)"""
+    lt = time.localtime(timestamp)
+    return f"{lt.tm_year:04d}-{lt.tm_mon:02d}-{lt.tm_mday:02d} {lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}"
+
+@st.cache_resource
+def open_log_file():
+    """Membuka LOG_FILE sekali per proses (append, line-buffered) dan dipakai ulang antar rerun"""
+    f = open(LOG_FILE, 'a', encoding='utf-8', buffering=1)
+    atexit.register(f.close)
+    return f
+
+@st.cache_resource
+def log_lock():
+    """Lock bersama untuk handle log (modul dieksekusi ulang tiap rerun, jadi tidak bisa global biasa)"""
+    return threading.Lock()
+
+def write_log(text):
+    """Menulis ke handle log yang tetap terbuka; dibuka ulang jika file log dihapus/diganti"""
+    with log_lock():
+        f = open_log_file()
+        try:
+            stale = os.fstat(f.fileno()).st_ino != os.stat(LOG_FILE).st_ino
+        except OSError:
+            stale = True
+        if stale:
+            f.close()
+            atexit.unregister(f.close)
+            open_log_file.clear()
+            f = open_log_file()
+        f.write(text)
+
+def log_activity(level, message, filename="", buffer=None):
+    """Mencatat aktivitas ke file log (atau ke buffer jika diberikan, untuk ditulis sekaligus)"""
+    timestamp = format_timestamp()
     log_entry = f"[{timestamp}] {level}: {message}"
     if filename:
         log_entry += f' (File: "{filename}")'
     
-    with open(LOG_FILE, 'a', encoding='utf-8') as f:
-        f.write(log_entry + "\n")
+    if buffer is not None:
+        buffer.append(log_entry)
+        return log_entry
+
+    write_log(log_entry + "\n")
     
     return log_entry
 
+@st.cache_data(show_spinner=False, max_entries=1)
+def read_hash_db(mtime_ns):
+    """Mem-parse hash_db.json; cache di-key oleh mtime file agar tidak di-parse ulang tiap rerun"""
+    try:
+        if orjson is not None:
+            return orjson.loads(Path(HASH_DB_FILE).read_bytes())
+        with open(HASH_DB_FILE, 'r') as f:
+            return json.load(f)
+    except:
+        return {}
+
 def load_hash_db():
     """Membaca database hash"""
     if os.path.exists(HASH_DB_FILE):
-        try:
-            with open(HASH_DB_FILE, 'r') as f:
-                return json.load(f)
-        except:
-            return {}
+        return read_hash_db(os.stat(HASH_DB_FILE).st_mtime_ns)
     return {}
 
 def save_hash_db(hash_db):
-    """Menyimpan database hash"""
-    with open(HASH_DB_FILE, 'w') as f:
-        json.dump(hash_db, f, indent=2)
+    """Menyimpan database hash (atomik via file sementara + os.replace)"""
+    # Nama file sementara unik, agar dua sesi yang menyimpan bersamaan tidak saling menimpa
+    fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(HASH_DB_FILE)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if orjson is not None:
+                f.write(orjson.dumps(hash_db, option=orjson.OPT_INDENT_2))
+            else:
+                f.write(json.dumps(hash_db, indent=2).encode('utf-8'))
+            # Pastikan isi sudah di disk sebelum menggantikan baseline lama
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, HASH_DB_FILE)
+    except:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    read_hash_db.clear()
 
-def scan_files():
+def iter_files(folder, prefix=""):
+    """Menelusuri file secara rekursif dengan os.scandir (stat di-cache oleh DirEntry)"""
+    try:
+        it = os.scandir(folder)
+    except OSError:
+        # Folder yang tidak bisa dibaca dilewati, seperti os.walk
+        return
+    with it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_files(entry.path, prefix + entry.name + os.sep)
+            elif entry.is_file():
+                yield prefix + entry.name, entry
+
+def scan_files(hash_db=None):
     """Memindai semua file di folder secure_files secara rekursif"""
+    hash_db = hash_db or {}
     current_files = {}
     if os.path.exists(SECURE_FOLDER):
-        for root, dirs, files in os.walk(SECURE_FOLDER):
-            for filename in files:
-                filepath = os.path.join(root, filename)
-                relative_path = os.path.relpath(filepath, SECURE_FOLDER)
-                file_hash = calculate_hash(filepath)
-                if file_hash:
-                    current_files[relative_path] = {
-                        'hash': file_hash,
-                        'size': os.path.getsize(filepath),
-                        'modified': datetime.fromtimestamp(os.path.getmtime(filepath)).strftime("%Y-%m-%d %H:%M:%S"),
-                        'path': os.path.dirname(relative_path) if os.path.dirname(relative_path) else "/"
-                    }
+        entries = []
+        cached = {}
+        for relative_path, entry in iter_files(SECURE_FOLDER):
+            try:
+                stat = entry.stat()
+            except OSError:
+                # File terhapus di antara listing dan stat
+                continue
+            known = hash_db.get(relative_path)
+            entries.append((relative_path, entry.path, stat, known))
+            # Lewati hash ulang jika size, mtime_ns, ctime_ns, dan inode sama dengan baseline
+            # (ctime wajib: mtime bisa dikembalikan dengan os.utime, ctime tidak)
+            if (known and known.get('size') == stat.st_size
+                    and known.get('mtime_ns') == stat.st_mtime_ns
+                    and known.get('ctime_ns') == stat.st_ctime_ns
+                    and known.get('inode') == stat.st_ino):
+                cached[relative_path] = (known['hash'], known.get('blake3'))
+
+        # Hash paralel (hanya file yang berubah); hashlib/blake3 melepas GIL selama update
+        to_hash = [(filepath, known) for relative_path, filepath, _, known in entries if relative_path not in cached]
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = executor.map(lambda item: hash_file(*item), to_hash)
+            hashes = {filepath: result for (filepath, _), result in zip(to_hash, results)}
+
+        for relative_path, filepath, stat, _ in entries:
+            file_hash, fingerprint = cached.get(relative_path) or hashes[filepath]
+            if file_hash:
+                current_files[relative_path] = {
+                    'hash': file_hash,
+                    'blake3': fingerprint,
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'ctime_ns': stat.st_ctime_ns,
+                    'inode': stat.st_ino,
+                    'modified': format_timestamp(stat.st_mtime),
+                    'path': os.path.dirname(relative_path) if os.path.dirname(relative_path) else "/"
+                }
     return current_files
 
 def check_integrity():
     """Memeriksa integritas file dan mendeteksi perubahan"""
     try:
+        st.session_state.pop('current_files', None)
         hash_db = load_hash_db()
-        current_files = scan_files()
+        current_files = scan_files(hash_db)
+        # Disimpan agar tab File Manager tidak memindai ulang di rerun yang sama
+        st.session_state['current_files'] = current_files
+        log_buffer = []
         
         results = {
             'safe': [],
@@ -90,24 +261,28 @@ def check_integrity():
         for filename, info in current_files.items():
             if filename in hash_db:
                 if hash_db[filename]['hash'] == info['hash']:
-                    # File unchanged; don't spam logs on every scan
+                    # File unchanged; don't spam logs on every scan (no per-scan summary either)
                     results['safe'].append(filename)
                 else:
                     results['modified'].append(filename)
-                    log_activity("WARNING", "File integrity failed! Hash mismatch detected", filename)
+                    log_activity("WARNING", "File integrity failed! Hash mismatch detected", filename, log_buffer)
             else:
                 results['new'].append(filename)
-                log_activity("ALERT", "Unknown file detected (new file added)", filename)
+                log_activity("ALERT", "Unknown file detected (new file added)", filename, log_buffer)
         
         # Cek file yang hilang
         for filename in hash_db:
             if filename not in current_files:
                 results['deleted'].append(filename)
-                log_activity("ALERT", "File has been deleted", filename)
+                log_activity("ALERT", "File has been deleted", filename, log_buffer)
         
     # NOTE: do NOT overwrite the baseline on every scan.
     # Baseline should only be updated when the user explicitly creates/updates it.
     # save_hash_db(current_files)
+
+        # Tulis semua log scan ini dengan satu write
+        if log_buffer:
+            write_log("\n".join(log_buffer) + "\n")
         
         return results
     except Exception as e:
@@ -119,8 +294,18 @@ def check_integrity():
             'new': []
         }
 
-def parse_logs():
-    """Membaca dan menganalisis file log"""
+def parse_level(log):
+    """Mengambil token level dari baris log, atau None jika baris tidak berformat"""
+    # Level selalu di offset 22: "[YYYY-MM-DD HH:MM:SS] LEVEL: ..."
+    # Prefilter murah: baris kosong/tidak berformat tidak punya ':' setelah level
+    level_end = log.find(':', 22, 32)
+    if level_end == -1:
+        return None
+    return log[22:level_end]
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def read_logs(mtime_ns, size):
+    """Menganalisis file log; cache di-key oleh mtime dan ukuran file agar tidak di-parse ulang tiap rerun"""
     stats = {
         'total_logs': 0,
         'info': 0,
@@ -131,29 +316,37 @@ def parse_logs():
     }
     
     if os.path.exists(LOG_FILE):
+        # Baca per baris (streaming); memori O(RECENT_LOG_COUNT) berapapun ukuran log
+        recent_logs = deque(maxlen=RECENT_LOG_COUNT)
         with open(LOG_FILE, 'r', encoding='utf-8') as f:
-            logs = f.readlines()
-            stats['total_logs'] = len(logs)
-            
-            for log in logs:
-                if 'INFO' in log:
-                    stats['info'] += 1
-                elif 'WARNING' in log:
-                    stats['warning'] += 1
-                    stats['last_anomaly'] = log.split(']')[0].replace('[', '')
-                elif 'ALERT' in log:
-                    stats['alert'] += 1
-                    stats['last_anomaly'] = log.split(']')[0].replace('[', '')
-            
-            # Ambil 10 log terakhir
-            stats['recent_logs'] = logs[-10:][::-1]
+            for log in f:
+                stats['total_logs'] += 1
+                recent_logs.append(log.strip())
+                key = LOG_LEVELS.get(parse_level(log))
+                if key is None:
+                    continue
+                stats[key] += 1
+                if key != 'info':
+                    stats['last_anomaly'] = log[1:20]
+
+        # Ambil log terakhir, terbaru di atas
+        stats['recent_logs'] = list(reversed(recent_logs))
     
     return stats
 
+def parse_logs():
+    """Membaca dan menganalisis file log"""
+    if os.path.exists(LOG_FILE):
+        stat = os.stat(LOG_FILE)
+        return read_logs(stat.st_mtime_ns, stat.st_size)
+    return read_logs(None, None)
+
 def create_baseline():
     """Membuat baseline hash untuk semua file saat ini"""
     current_files = scan_files()
-    save_hash_db(current_files)
+    # Lewati penulisan ulang jika baseline tidak berubah
+    if current_files != load_hash_db():
+        save_hash_db(current_files)
     log_activity("INFO", f"Baseline created for {len(current_files)} files")
     return len(current_files)
 
@@ -188,7 +381,7 @@ except Exception:
 # Run an integrity check on every app run (autorefresh will reload the page)
 current_results = check_integrity()
 st.session_state['scan_results'] = current_results
-st.session_state['last_scan'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+st.session_state['last_scan'] = format_timestamp()
 
 # Sidebar
 with st.sidebar:
@@ -216,6 +409,7 @@ with st.sidebar:
         st.metric("File Terdaftar", len(hash_db))
     else:
         st.warning("⚠️ Belum ada baseline")
+    st.caption(f"Backend SHA256: {SHA256_BACKEND}")
 
 # Tab utama
 tab1, tab2, tab3, tab4 = st.tabs(["📊 Dashboard", "📁 File Manager", "📜 Log Activity", "📖 Panduan"])
@@ -291,24 +485,24 @@ with tab2:
     
     # Update file manager
     with file_manager_container.container():
-        current_files = scan_files()
+        current_files = st.session_state.get('current_files')
+        if current_files is None:
+            current_files = scan_files(load_hash_db())
         total_files = len(current_files)
         if total_files > 0:
             st.success(f"Ditemukan {total_files} file")
 
-            # Buat tabel
-            data = []
-            for filename, info in current_files.items():
-                data.append({
-                    'Nama File': filename,
-                    'Path': info['path'],
-                    'Ukuran (bytes)': info['size'],
-                    'Terakhir Diubah': info['modified'],
-                    'Hash (8 digit)': info['hash'][:8] + "..."
-                })
-
-            df = pd.DataFrame(data)
-            st.dataframe(df, use_container_width=True)
+            # Buat tabel (dict of lists, tanpa membangun DataFrame pandas)
+            files = current_files.values()
+            data = {
+                'Nama File': list(current_files),
+                'Path': [info['path'] for info in files],
+                'Ukuran (bytes)': [info['size'] for info in files],
+                'Terakhir Diubah': [info['modified'] for info in files],
+                'Hash (8 digit)': [info['hash'][:8] + "..." for info in files]
+            }
+
+            st.dataframe(data, use_container_width=True)
         else:
             st.warning("📭 Belum ada file di folder secure_files/")
             st.info("💡 **Tip:** Tambahkan file ke folder `secure_files/` lalu klik 'Scan Sekarang'")
@@ -320,7 +514,7 @@ with tab3:
         # Tombol reset di atas
         col1, col2 = st.columns([3, 1])
         with col1:
-            st.subheader("🕒 10 Log Terakhir")
+            st.subheader(f"🕒 {RECENT_LOG_COUNT} Log Terakhir")
         with col2:
             if st.button("🗑️ Hapus Semua Log", type="secondary"):
                 if reset_logs():
@@ -329,13 +523,7 @@ with tab3:
                     st.rerun()
         
         for log in stats['recent_logs']:
-            log = log.strip()
-            if 'ALERT' in log:
-                st.error(log)
-            elif 'WARNING' in log:
-                st.warning(log)
-            else:
-                st.info(log)
+            LEVEL_HANDLERS.get(parse_level(log), st.info)(log)
         
         st.divider()
         